@@ -0,0 +1,8 @@
+//go:build !linux || !(amd64 || arm64)
+
+package main
+
+import "os"
+
+// adviseSequential is a no-op where posix_fadvise is not wired up.
+func adviseSequential(f *os.File) {}
@@ -0,0 +1,11 @@
+//go:build !unix
+
+package main
+
+import "os"
+
+// fileID returns zeros: device and inode numbers are not exposed on this
+// platform, so the cache falls back to mtime+size validation.
+func fileID(info os.FileInfo) (dev, ino uint64) {
+	return 0, 0
+}
@@ -1,25 +1,35 @@
 package main
 
 import (
+	"bufio"
 	"crypto/sha256"
+	"encoding/binary"
 	"encoding/hex"
 	"encoding/json"
 	"flag"
 	"fmt"
+	"hash"
 	"io"
+	"io/fs"
 	"os"
 	"path/filepath"
 	"runtime"
 	"sort"
+	"strconv"
 	"strings"
 	"sync"
 	"time"
 )
 
+// out buffers stdout so per-file result lines do not each cost a write(2).
+// It is flushed after every path argument.
+var out = bufio.NewWriterSize(os.Stdout, 64<<10)
+
 var (
 	verbose    bool
 	jsonOutput bool
 	trackTime  bool
+	noCache    bool
 )
 
 // Node represents a file or directory in the tree.
@@ -28,33 +38,80 @@ type Node struct {
 	Name       string
 	IsDir      bool
 	Size       int64
-	ModTime    time.Time
+	Info       os.FileInfo // stat data reused by hashFile: lstat from the walk (nil for symlinks) or os.Stat for argument files
 	Children   []*Node
 	Hash       string // file: SHA-256 of content; dir: Merkle hash of children (hash1)
 	StructHash string // dir only: hash of immediate children names+sizes (hash2)
 }
 
-// CacheEntry stores a cached file hash with mtime+size for validation.
+// CacheEntry stores a cached file hash with mtime+size+device+inode for validation.
 type CacheEntry struct {
-	Hash    string `json:"hash"`
-	Size    int64  `json:"size"`
-	ModNano int64  `json:"mod_nano"`
+	Hash    string
+	Size    int64
+	ModNano int64
+	Dev     uint64
+	Ino     uint64
 }
 
-// Cache is a thread-safe file hash cache.
+// Cache is the file hash cache. Entries is only read while files are being
+// hashed, so workers look it up without locking; newly computed hashes are
+// collected per worker and applied with merge once hashing has finished.
 type Cache struct {
-	Entries map[string]CacheEntry `json:"entries"`
-	mu      sync.RWMutex
+	Entries map[string]CacheEntry
+	dirty   bool // set when an entry is added or replaced since load
+}
+
+// cacheUpdate is a hash computed during this run, pending merge into a Cache.
+type cacheUpdate struct {
+	path  string
+	entry CacheEntry
+}
+
+// merge applies updates to the cache. It must not run concurrently with
+// hashFile calls that read the same cache.
+func (c *Cache) merge(updates []cacheUpdate) {
+	for _, u := range updates {
+		c.Entries[u.path] = u.entry
+	}
+	if len(updates) > 0 {
+		c.dirty = true
+	}
 }
 
 // SavedState stores hashes from the previous run for change detection.
+// It is rewritten only when changes are detected, so Timestamp is the time of
+// the last change rather than the last scan.
 type SavedState struct {
 	Files     map[string]string      `json:"files"`
 	Folders   map[string][2]string   `json:"folders"`
 	Timestamp float64                `json:"timestamp"`
 }
 
-const cacheFile = ".syntegrity_cache.json"
+const cacheFile = ".syntegrity_cache.bin"
+
+// maxWorkers caps the number of concurrent file hashers.
+const maxWorkers = 32
+
+// readBufSize is the chunk size used when streaming file contents into SHA-256.
+const readBufSize = 1 << 20
+
+// hasherPool recycles read buffers and SHA-256 states across files so hashing
+// does not allocate per file.
+var hasherPool = sync.Pool{
+	New: func() any {
+		return &fileHasher{buf: make([]byte, readBufSize), h: sha256.New()}
+	},
+}
+
+// largeFileSize is the size from which reading and hashing are overlapped.
+const largeFileSize = 16 << 20
+
+// fileHasher holds the reusable state needed to hash one file at a time.
+type fileHasher struct {
+	buf   []byte
+	spare []byte // second buffer for read-ahead, allocated on first large file
+	h     hash.Hash
+}
 
 func main() {
 	flag.BoolVar(&verbose, "v", false, "verbose output: show file/folder hashes and hierarchical structure")
@@ -62,6 +119,7 @@ func main() {
 	flag.BoolVar(&jsonOutput, "json", false, "output change detection as JSON")
 	flag.BoolVar(&trackTime, "t", false, "show processing time")
 	flag.BoolVar(&trackTime, "time", false, "show processing time")
+	flag.BoolVar(&noCache, "no-cache", false, "ignore the hash cache and rehash every file")
 	flag.Usage = func() {
 		fmt.Fprintf(os.Stderr, "Usage: syntegrity [options] <path> [path...]\n\nOptions:\n")
 		flag.PrintDefaults()
@@ -74,51 +132,84 @@ func main() {
 		os.Exit(1)
 	}
 
-	cache := loadCache()
+	// By default a file whose stat data matches its cache entry is not read
+	// at all. --no-cache opts out of that trust for security-sensitive checks.
+	cache := &Cache{Entries: make(map[string]CacheEntry)}
+	if !noCache {
+		cache = loadCache()
+	}
 	start := time.Now()
 
-	for _, p := range paths {
+	// Stat every argument up front so plain file arguments are hashed
+	// together on the worker pool rather than one after another. Their
+	// hashes are still printed in argument order below, but open/read errors
+	// from hashing them reach stderr up front, before any directory output.
+	fileArgs := make([]*Node, len(paths))
+	statErrs := make([]error, len(paths))
+	var toHash []*Node
+	for i, p := range paths {
 		info, err := os.Stat(p)
 		if err != nil {
-			fmt.Fprintf(os.Stderr, "Error: %v\n", err)
+			statErrs[i] = err
 			continue
 		}
-		if info.IsDir() {
-			processDir(p, cache)
-		} else {
-			h := hashFile(p, cache)
-			if h != "" {
-				fmt.Printf("%s: %s\n", p, h)
+		if !info.IsDir() {
+			fileArgs[i] = &Node{Path: p, Name: info.Name(), Size: info.Size(), Info: info}
+			toHash = append(toHash, fileArgs[i])
+		}
+	}
+	hashAllFiles(toHash, cache)
+
+	for i, p := range paths {
+		if statErrs[i] != nil {
+			fmt.Fprintf(os.Stderr, "Error: %v\n", statErrs[i])
+			continue
+		}
+		if n := fileArgs[i]; n != nil {
+			if n.Hash != "" {
+				fmt.Fprintf(out, "%s: %s\n", p, n.Hash)
 			}
+		} else {
+			processDir(p, cache)
 		}
+		out.Flush()
 	}
 
-	saveCache(cache)
+	if !noCache {
+		saveCache(cache)
+	}
 	if verbose || trackTime {
-		fmt.Printf("\nTotal processing time: %.2fs\n", time.Since(start).Seconds())
+		fmt.Fprintf(out, "\nTotal processing time: %.2fs\n", time.Since(start).Seconds())
 	}
+	out.Flush()
 }
 
-// buildTree walks the directory once and builds an in-memory tree.
-func buildTree(dir string) (*Node, error) {
+// buildTree walks the directory once and builds an in-memory tree. It also
+// returns the file nodes in walk (pre-order) order, so later phases do not
+// have to re-traverse the tree to find them. If emit is non-nil, each file
+// node is passed to it as soon as it is discovered.
+func buildTree(dir string, emit func(*Node)) (*Node, []*Node, error) {
 	abs, err := filepath.Abs(dir)
 	if err != nil {
-		return nil, err
+		return nil, nil, err
 	}
 
-	info, err := os.Stat(abs)
-	if err != nil {
-		return nil, err
+	if _, err := os.Stat(abs); err != nil {
+		return nil, nil, err
 	}
 
 	root := &Node{
-		Path:    abs,
-		Name:    filepath.Base(abs),
-		IsDir:   true,
-		ModTime: info.ModTime(),
+		Path:  abs,
+		Name:  filepath.Base(abs),
+		IsDir: true,
 	}
 
-	nodes := map[string]*Node{abs: root}
+	// WalkDir visits depth-first, so the open directories form a stack and an
+	// entry's parent is always found on it without a path-keyed lookup. It
+	// also reads each directory in lexical order, so children are appended
+	// already sorted by name and need no separate sort pass.
+	stack := []*Node{root}
+	var files []*Node
 
 	err = filepath.WalkDir(abs, func(path string, d os.DirEntry, err error) error {
 		if err != nil {
@@ -129,95 +220,176 @@ func buildTree(dir string) (*Node, error) {
 			return nil
 		}
 
-		info, err := d.Info()
-		if err != nil {
-			fmt.Fprintf(os.Stderr, "stat: %s: %v\n", path, err)
-			return nil
+		n := &Node{
+			Path:  path,
+			Name:  d.Name(),
+			IsDir: d.IsDir(),
 		}
 
-		n := &Node{
-			Path:    path,
-			Name:    d.Name(),
-			IsDir:   d.IsDir(),
-			Size:    info.Size(),
-			ModTime: info.ModTime(),
+		// The entry type comes from readdir, so directories need no lstat:
+		// only files contribute size (hash2) and stat data (cache validation).
+		// The lstat is kept so hashing does not stat the file a second time,
+		// except for symlinks, whose cache key must describe the target.
+		if !n.IsDir {
+			info, err := d.Info()
+			if err != nil {
+				fmt.Fprintf(os.Stderr, "stat: %s: %v\n", path, err)
+				return nil
+			}
+			n.Size = info.Size()
+			if d.Type()&fs.ModeSymlink == 0 {
+				n.Info = info
+			}
 		}
 
-		if parent, ok := nodes[filepath.Dir(path)]; ok {
-			parent.Children = append(parent.Children, n)
+		parentPath := path[:len(path)-len(n.Name)]
+		if len(parentPath) > 1 && os.IsPathSeparator(parentPath[len(parentPath)-1]) {
+			parentPath = parentPath[:len(parentPath)-1]
+		}
+		for len(stack) > 1 && stack[len(stack)-1].Path != parentPath {
+			stack = stack[:len(stack)-1]
 		}
-		if d.IsDir() {
-			nodes[path] = n
+		parent := stack[len(stack)-1]
+		parent.Children = append(parent.Children, n)
+		if n.IsDir {
+			stack = append(stack, n)
+		} else {
+			files = append(files, n)
+			if emit != nil {
+				emit(n)
+			}
 		}
 		return nil
 	})
 
-	sortTree(root)
-	return root, err
+	return root, files, err
 }
 
-func sortTree(n *Node) {
-	sort.Slice(n.Children, func(i, j int) bool {
-		return n.Children[i].Name < n.Children[j].Name
-	})
-	for _, c := range n.Children {
-		if c.IsDir {
-			sortTree(c)
-		}
+// hashAllFiles hashes the given file nodes concurrently.
+func hashAllFiles(files []*Node, cache *Cache) {
+	// Hand out the largest files first (LPT scheduling) so a big file late in
+	// the list cannot become a straggler that idles every other worker at the
+	// tail. The caller's slice keeps its order for reporting.
+	order := make([]*Node, len(files))
+	copy(order, files)
+	sort.SliceStable(order, func(i, j int) bool { return order[i].Size > order[j].Size })
+
+	p := newHashPool(cache)
+	for _, n := range order {
+		p.add(n)
 	}
+	p.wait()
 }
 
-// hashAllFiles hashes every file in the tree concurrently.
-func hashAllFiles(root *Node, cache *Cache) {
-	var files []*Node
-	collectFiles(root, &files)
+// hashPool hashes file nodes on a fixed set of workers while the caller is
+// still producing them, so a directory walk and file hashing overlap instead
+// of running one after the other. The tree and cache are shared in memory;
+// nothing is copied. Each worker keeps its own list of new cache entries,
+// merged into the cache by wait.
+type hashPool struct {
+	cache   *Cache
+	large   chan *Node // files of largeFileSize and up, taken first
+	small   chan *Node
+	wg      sync.WaitGroup
+	updates [][]cacheUpdate
+}
 
-	workers := runtime.NumCPU()
-	if workers > 16 {
-		workers = 16
+// hashQueueSize bounds how far the producer may run ahead of the workers.
+const hashQueueSize = 1024
+
+func newHashPool(cache *Cache) *hashPool {
+	// Hashing spends much of its time waiting on disk reads, so run more
+	// workers than cores to keep the device queue full.
+	workers := runtime.NumCPU() * 4
+	if workers > maxWorkers {
+		workers = maxWorkers
 	}
 
-	sem := make(chan struct{}, workers)
-	var wg sync.WaitGroup
+	p := &hashPool{
+		cache:   cache,
+		large:   make(chan *Node, hashQueueSize),
+		small:   make(chan *Node, hashQueueSize),
+		updates: make([][]cacheUpdate, workers),
+	}
+	for i := range p.updates {
+		p.wg.Add(1)
+		go p.work(&p.updates[i])
+	}
+	return p
+}
 
-	for _, f := range files {
-		wg.Add(1)
-		go func(node *Node) {
-			sem <- struct{}{}
-			defer func() { <-sem; wg.Done() }()
-			node.Hash = hashFile(node.Path, cache)
-		}(f)
+// add queues n for hashing. Its Hash is set once wait has returned.
+func (p *hashPool) add(n *Node) {
+	if n.Size >= largeFileSize {
+		p.large <- n
+	} else {
+		p.small <- n
 	}
-	wg.Wait()
 }
 
-func collectFiles(n *Node, out *[]*Node) {
-	if !n.IsDir {
-		*out = append(*out, n)
-		return
+// wait signals that no more files will be added, waits for all queued files
+// to be hashed, and merges the new hashes into the cache.
+func (p *hashPool) wait() {
+	close(p.large)
+	close(p.small)
+	p.wg.Wait()
+	for _, u := range p.updates {
+		p.cache.merge(u)
 	}
-	for _, c := range n.Children {
-		collectFiles(c, out)
+}
+
+func (p *hashPool) work(local *[]cacheUpdate) {
+	defer p.wg.Done()
+	large, small := p.large, p.small
+	for large != nil || small != nil {
+		var n *Node
+		var ok bool
+		// Large files jump the queue: the walk may find them at any point,
+		// and starting them early keeps them from straggling at the tail.
+		select {
+		case n, ok = <-large:
+			if !ok {
+				large = nil
+				continue
+			}
+		default:
+			select {
+			case n, ok = <-large:
+				if !ok {
+					large = nil
+					continue
+				}
+			case n, ok = <-small:
+				if !ok {
+					small = nil
+					continue
+				}
+			}
+		}
+		n.Hash = hashFile(n.Path, n.Info, p.cache, local)
 	}
 }
 
-// hashFile computes SHA-256 of a file, using cache when mtime+size match.
-func hashFile(path string, cache *Cache) string {
-	info, err := os.Stat(path)
-	if err != nil {
-		fmt.Fprintf(os.Stderr, "stat: %s: %v\n", path, err)
-		return ""
+// hashFile computes SHA-256 of a file, using cache when mtime+size+device+inode match.
+// info is the caller's stat of path; if nil, hashFile stats the path itself.
+// A freshly computed hash is appended to updates rather than written to the
+// cache, so concurrent callers can share cache without locking.
+func hashFile(path string, info os.FileInfo, cache *Cache, updates *[]cacheUpdate) string {
+	if info == nil {
+		var err error
+		if info, err = os.Stat(path); err != nil {
+			fmt.Fprintf(os.Stderr, "stat: %s: %v\n", path, err)
+			return ""
+		}
 	}
 
 	modNano := info.ModTime().UnixNano()
 	size := info.Size()
+	dev, ino := fileID(info)
 
-	cache.mu.RLock()
-	if e, ok := cache.Entries[path]; ok && e.Size == size && e.ModNano == modNano {
-		cache.mu.RUnlock()
+	if e, ok := cache.Entries[path]; ok && e.Size == size && e.ModNano == modNano && e.Dev == dev && e.Ino == ino {
 		return e.Hash
 	}
-	cache.mu.RUnlock()
 
 	f, err := os.Open(path)
 	if err != nil {
@@ -226,64 +398,184 @@ func hashFile(path string, cache *Cache) string {
 	}
 	defer f.Close()
 
-	h := sha256.New()
-	if _, err := io.Copy(h, f); err != nil {
+	fh := hasherPool.Get().(*fileHasher)
+	defer hasherPool.Put(fh)
+
+	hash, err := fh.hashContents(f, size)
+	if err != nil {
 		fmt.Fprintf(os.Stderr, "read: %s: %v\n", path, err)
 		return ""
 	}
 
-	hash := hex.EncodeToString(h.Sum(nil))
-
-	cache.mu.Lock()
-	cache.Entries[path] = CacheEntry{Hash: hash, Size: size, ModNano: modNano}
-	cache.mu.Unlock()
+	*updates = append(*updates, cacheUpdate{path, CacheEntry{Hash: hash, Size: size, ModNano: modNano, Dev: dev, Ino: ino}})
 
 	return hash
 }
 
+// hashContents returns the hex SHA-256 of f, whose size at stat time was size.
+// Files smaller than the buffer are read in a single call and hashed in one
+// shot; anything larger, or a small file that grew since stat, is streamed
+// through the reused hash state.
+func (fh *fileHasher) hashContents(f *os.File, size int64) (string, error) {
+	buf := fh.buf
+	var head []byte
+	if size < int64(len(buf)) {
+		want := int(size)
+		n := 0
+		for {
+			// Ask for one byte more than expected so growth is detected
+			// without a separate EOF read when the size still matches.
+			m, err := f.Read(buf[n : want+1])
+			n += m
+			if err != nil && err != io.EOF {
+				return "", err
+			}
+			if err == io.EOF || n == want {
+				sum := sha256.Sum256(buf[:n])
+				return hex.EncodeToString(sum[:]), nil
+			}
+			if n > want {
+				head = buf[:n]
+				break
+			}
+		}
+	}
+
+	// Anything past this point needs more than one read; let the kernel
+	// know the access is sequential so readahead stays ahead of the hasher.
+	adviseSequential(f)
+
+	fh.h.Reset()
+	fh.h.Write(head)
+	if size >= largeFileSize {
+		if err := fh.readAhead(f); err != nil {
+			return "", err
+		}
+	} else if err := copyToHash(fh.h, f, buf); err != nil {
+		return "", err
+	}
+	var sum [sha256.Size]byte
+	return hex.EncodeToString(fh.h.Sum(sum[:0])), nil
+}
+
+// readAhead streams f into fh.h with double buffering: a reader goroutine
+// fills one buffer while the other is being hashed, so disk latency on large
+// cold files overlaps with SHA-256 instead of alternating with it. The digest
+// is still a single sequential SHA-256, identical to copyToHash.
+func (fh *fileHasher) readAhead(f *os.File) error {
+	if fh.spare == nil {
+		fh.spare = make([]byte, readBufSize)
+	}
+
+	type chunk struct {
+		data []byte
+		err  error
+	}
+	free := make(chan []byte, 2)
+	full := make(chan chunk, 1)
+	free <- fh.buf
+	free <- fh.spare
+
+	go func() {
+		for b := range free {
+			n, err := f.Read(b)
+			full <- chunk{b[:n], err}
+			if err != nil {
+				return
+			}
+		}
+	}()
+
+	for c := range full {
+		fh.h.Write(c.data)
+		if c.err == io.EOF {
+			return nil
+		}
+		if c.err != nil {
+			return c.err
+		}
+		free <- c.data[:cap(c.data)]
+	}
+	return nil
+}
+
+// copyToHash streams r into h one buffer-full at a time. It deliberately avoids
+// io.Copy, which allocates a fresh 32 KiB buffer per call and bypasses buf when
+// the source implements io.WriterTo.
+func copyToHash(h hash.Hash, r io.Reader, buf []byte) error {
+	for {
+		n, err := r.Read(buf)
+		if n > 0 {
+			h.Write(buf[:n])
+		}
+		if err == io.EOF {
+			return nil
+		}
+		if err != nil {
+			return err
+		}
+	}
+}
+
 // computeFolderHashes computes hash1 (content Merkle) and hash2 (structure) bottom-up.
 func computeFolderHashes(n *Node) {
 	if !n.IsDir {
 		return
 	}
+	var scratch []byte
+	foldFolderHashes(n, &scratch)
+}
 
+// foldFolderHashes does the work of computeFolderHashes. scratch is shared by
+// the whole walk so hash input is assembled without per-folder allocations.
+func foldFolderHashes(n *Node, scratch *[]byte) {
+	// Post-order: every subfolder is final before its parent reads it. Only
+	// directories are descended into; file hashes are already in place.
 	for _, c := range n.Children {
-		computeFolderHashes(c)
+		if c.IsDir {
+			foldFolderHashes(c, scratch)
+		}
 	}
 
-	// hash1: Merkle hash — SHA-256 of sorted "type:name:childHash" entries
-	var parts []string
+	// Both hashes are built from the same immediate children, so gather the
+	// hash1 entries ("type:name:childHash") and hash2 entries (names + sizes
+	// only, no mtime, avoids false positives) in a single pass.
+	parts := make([]string, 0, len(n.Children))
+	sp := make([]string, 0, len(n.Children))
 	for _, c := range n.Children {
 		if c.IsDir {
 			parts = append(parts, "folder:"+c.Name+":"+c.Hash)
+			sp = append(sp, "dir:"+c.Name)
 		} else {
 			parts = append(parts, "file:"+c.Name+":"+c.Hash)
+			sp = append(sp, "file:"+c.Name+":"+strconv.FormatInt(c.Size, 10))
 		}
 	}
+
+	// hash1: Merkle hash — SHA-256 of sorted child entries
 	sort.Strings(parts)
+	n.Hash = hashJoined(parts, scratch)
 
-	h1 := sha256.New()
-	if len(parts) > 0 {
-		h1.Write([]byte(strings.Join(parts, "|")))
-	}
-	n.Hash = hex.EncodeToString(h1.Sum(nil))
+	// hash2: structure hash — SHA-256 of sorted name+size entries
+	sort.Strings(sp)
+	n.StructHash = hashJoined(sp, scratch)
+}
 
-	// hash2: structure hash — names + sizes only (no mtime, avoids false positives)
-	var sp []string
-	for _, c := range n.Children {
-		if c.IsDir {
-			sp = append(sp, "dir:"+c.Name)
-		} else {
-			sp = append(sp, fmt.Sprintf("file:%s:%d", c.Name, c.Size))
+// hashJoined returns the hex SHA-256 of parts joined with "|". The input is
+// assembled in the reusable scratch buffer rather than via strings.Join plus a
+// []byte conversion, which copied every folder's entries twice.
+func hashJoined(parts []string, scratch *[]byte) string {
+	buf := (*scratch)[:0]
+	for i, p := range parts {
+		if i > 0 {
+			buf = append(buf, '|')
 		}
+		buf = append(buf, p...)
 	}
-	sort.Strings(sp)
+	*scratch = buf
 
-	h2 := sha256.New()
-	if len(sp) > 0 {
-		h2.Write([]byte(strings.Join(sp, "|")))
-	}
-	n.StructHash = hex.EncodeToString(h2.Sum(nil))
+	sum := sha256.Sum256(buf)
+	return hex.EncodeToString(sum[:])
 }
 
 // ChangeEvent represents a single detected change for JSON output.
@@ -294,52 +586,56 @@ type ChangeEvent struct {
 
 // processDir handles a single directory: build tree, hash, print results, detect changes.
 func processDir(dir string, cache *Cache) {
-	root, err := buildTree(dir)
+	// Files are hashed while the walk is still discovering the rest of the
+	// tree; folder hashes need every file hash, so they wait for the pool.
+	pool := newHashPool(cache)
+	root, files, err := buildTree(dir, pool.add)
+	pool.wait()
 	if err != nil {
 		fmt.Fprintf(os.Stderr, "Error: %v\n", err)
 		return
 	}
 
-	hashAllFiles(root, cache)
 	computeFolderHashes(root)
 
 	if verbose {
-		fmt.Printf("Processing directory: %s\n", dir)
-		fmt.Println(strings.Repeat("-", 50))
+		fmt.Fprintf(out, "Processing directory: %s\n", dir)
+		fmt.Fprintln(out, strings.Repeat("-", 50))
 
 		// Print file results
-		fmt.Println("Processing files:")
+		fmt.Fprintln(out, "Processing files:")
 		var fileCount int
-		walkTree(root, func(n *Node) {
-			if !n.IsDir && n.Hash != "" {
-				fmt.Printf("%s: %s\n", n.Path, n.Hash)
+		for _, n := range files {
+			if n.Hash != "" {
+				fmt.Fprintf(out, "%s: %s\n", n.Path, n.Hash)
 				fileCount++
 			}
-		})
-		fmt.Printf("Processed %d files\n\n", fileCount)
+		}
+		fmt.Fprintf(out, "Processed %d files\n\n", fileCount)
 
 		// Print folder results
-		fmt.Println("Processing folders:")
+		fmt.Fprintln(out, "Processing folders:")
 		var folderCount int
 		walkTree(root, func(n *Node) {
 			if n.IsDir {
-				fmt.Printf("%s:[%s];[%s]\n", n.Name, n.Hash, n.StructHash)
+				fmt.Fprintf(out, "%s:[%s];[%s]\n", n.Name, n.Hash, n.StructHash)
 				folderCount++
 			}
 		})
-		fmt.Printf("Processed %d folders\n\n", folderCount)
+		fmt.Fprintf(out, "Processed %d folders\n\n", folderCount)
 
 		// Hierarchical structure
-		fmt.Println("Hierarchical Structure:")
-		fmt.Println(strings.Repeat("-", 50))
-		fmt.Println(hierString(root))
-		fmt.Println()
+		fmt.Fprintln(out, "Hierarchical Structure:")
+		fmt.Fprintln(out, strings.Repeat("-", 50))
+		writeHier(out, root)
+		fmt.Fprintln(out)
+		fmt.Fprintln(out)
 	}
 
 	// Change detection
-	absDir, _ := filepath.Abs(dir)
-	fileResults, folderResults := collectResults(root, absDir)
-	changes := detectChanges(absDir, fileResults, folderResults)
+	absDir := root.Path
+	fileResults, folderResults := collectResults(root, files, absDir)
+	changes, hadState := detectChanges(absDir, fileResults, folderResults)
 
 	if jsonOutput {
 		events := make([]ChangeEvent, 0, len(changes))
@@ -350,18 +646,22 @@ func processDir(dir string, cache *Cache) {
 			}
 		}
 		data, _ := json.MarshalIndent(events, "", "  ")
-		fmt.Println(string(data))
+		fmt.Fprintln(out, string(data))
 	} else {
 		if len(changes) > 0 {
 			for _, c := range changes {
-				fmt.Println(c)
+				fmt.Fprintln(out, c)
 			}
 		} else {
-			fmt.Println("No changes detected.")
+			fmt.Fprintln(out, "No changes detected.")
 		}
 	}
 
-	saveState(absDir, fileResults, folderResults)
+	// An unchanged tree would write back identical hashes, so only rewrite
+	// the state file on the first run or when something actually changed.
+	if !hadState || len(changes) > 0 {
+		saveState(absDir, fileResults, folderResults)
+	}
 }
 
 func walkTree(n *Node, fn func(*Node)) {
@@ -371,45 +671,72 @@ func walkTree(n *Node, fn func(*Node)) {
 	}
 }
 
-// hierString builds the hierarchical bracket notation for the root.
+// writeHier writes the hierarchical bracket notation for the root to w.
 // Root: [hash1[children]]
-func hierString(n *Node) string {
-	inner := dirContents(n)
-	return fmt.Sprintf("[%s[%s]]", n.Hash, inner)
+// The notation is streamed straight into the output buffer in one pre-order
+// pass; building it as nested strings copied each subtree once per level.
+func writeHier(w *bufio.Writer, n *Node) {
+	w.WriteByte('[')
+	w.WriteString(n.Hash)
+	w.WriteByte('[')
+	writeDirContents(w, n)
+	w.WriteString("]]")
 }
 
-// dirContents builds the inner content string for a directory.
+// writeDirContents writes the inner content string for a directory.
 // Files: just hash. Dirs: hash[children]. Separated by /.
-func dirContents(n *Node) string {
-	var parts []string
-	for _, c := range n.Children {
+func writeDirContents(w *bufio.Writer, n *Node) {
+	for i, c := range n.Children {
+		if i > 0 {
+			w.WriteByte('/')
+		}
+		w.WriteString(c.Hash)
 		if c.IsDir {
-			sub := dirContents(c)
-			parts = append(parts, fmt.Sprintf("%s[%s]", c.Hash, sub))
-		} else {
-			parts = append(parts, c.Hash)
+			w.WriteByte('[')
+			writeDirContents(w, c)
+			w.WriteByte(']')
 		}
 	}
-	return strings.Join(parts, "/")
 }
 
 // collectResults gathers file and folder hashes with paths relative to baseDir.
-func collectResults(root *Node, baseDir string) (map[string]string, map[string][2]string) {
-	files := make(map[string]string)
+// Every node path was built by the walk under baseDir, so the relative path is
+// a plain suffix slice rather than a filepath.Rel call per node. files is the
+// walk's file list, which also sizes the file map up front so it never has to
+// grow and rehash on large trees.
+func collectResults(root *Node, files []*Node, baseDir string) (map[string]string, map[string][2]string) {
+	fileHashes := make(map[string]string, len(files))
 	folders := make(map[string][2]string)
 
-	walkTree(root, func(n *Node) {
-		rel, err := filepath.Rel(baseDir, n.Path)
-		if err != nil {
-			return
+	prefix := baseDir
+	if !strings.HasSuffix(prefix, string(os.PathSeparator)) {
+		prefix += string(os.PathSeparator)
+	}
+	rel := func(n *Node) string {
+		if n.Path == baseDir {
+			return "."
 		}
-		if n.IsDir {
-			folders[rel] = [2]string{n.Hash, n.StructHash}
-		} else if n.Hash != "" {
-			files[rel] = n.Hash
+		return strings.TrimPrefix(n.Path, prefix)
+	}
+
+	for _, n := range files {
+		if n.Hash != "" {
+			fileHashes[rel(n)] = n.Hash
 		}
-	})
-	return files, folders
+	}
+
+	var addFolders func(n *Node)
+	addFolders = func(n *Node) {
+		folders[rel(n)] = [2]string{n.Hash, n.StructHash}
+		for _, c := range n.Children {
+			if c.IsDir {
+				addFolders(c)
+			}
+		}
+	}
+	addFolders(root)
+
+	return fileHashes, folders
 }
 
 // --- Change Detection ---
@@ -431,22 +758,15 @@ func loadState(dir string) (map[string]string, map[string][2]string) {
 		return nil, nil
 	}
 
-	folders := make(map[string][2]string)
-	for k, v := range s.Folders {
-		folders[k] = v
-	}
-	return s.Files, folders
+	return s.Files, s.Folders
 }
 
 func saveState(dir string, files map[string]string, folders map[string][2]string) {
 	s := SavedState{
 		Files:     files,
-		Folders:   make(map[string][2]string),
+		Folders:   folders,
 		Timestamp: float64(time.Now().Unix()),
 	}
-	for k, v := range folders {
-		s.Folders[k] = v
-	}
 
 	data, err := json.MarshalIndent(s, "", "  ")
 	if err != nil {
@@ -458,10 +778,12 @@ func saveState(dir string, files map[string]string, folders map[string][2]string
 	}
 }
 
-func detectChanges(dir string, currentFiles map[string]string, currentFolders map[string][2]string) []string {
+// detectChanges compares the current hashes with the saved state for dir. The
+// second result reports whether a previous state existed at all.
+func detectChanges(dir string, currentFiles map[string]string, currentFolders map[string][2]string) ([]string, bool) {
 	prevFiles, prevFolders := loadState(dir)
 	if prevFiles == nil && prevFolders == nil {
-		return nil
+		return nil, false
 	}
 
 	type change struct {
@@ -470,6 +792,8 @@ func detectChanges(dir string, currentFiles map[string]string, currentFolders ma
 	}
 	var changes []change
 
+	// One pass per map: each key is looked up in its counterpart exactly once,
+	// and that single lookup classifies it as deleted, new, or common.
 	for p := range prevFiles {
 		if _, ok := currentFiles[p]; !ok {
 			changes = append(changes, change{1, "DELETED_FILE: " + p})
@@ -481,63 +805,154 @@ func detectChanges(dir string, currentFiles map[string]string, currentFolders ma
 		}
 	}
 	for p, h := range currentFiles {
-		if prev, ok := prevFiles[p]; ok && h != prev {
+		if prev, ok := prevFiles[p]; !ok {
+			changes = append(changes, change{5, "NEW_FILE: " + p})
+		} else if h != prev {
 			changes = append(changes, change{3, "MODIFIED_FILE: " + p})
 		}
 	}
-	for p := range currentFolders {
-		if _, ok := prevFolders[p]; !ok {
+	for p, curr := range currentFolders {
+		prev, ok := prevFolders[p]
+		if !ok {
 			changes = append(changes, change{4, "NEW_FOLDER: " + p})
+			continue
 		}
-	}
-	for p := range currentFiles {
-		if _, ok := prevFiles[p]; !ok {
-			changes = append(changes, change{5, "NEW_FILE: " + p})
+		if curr[0] != prev[0] {
+			changes = append(changes, change{6, "FOLDER_CONTENTS_CHANGED: " + p})
 		}
-	}
-	for p, curr := range currentFolders {
-		if prev, ok := prevFolders[p]; ok {
-			if curr[0] != prev[0] {
-				changes = append(changes, change{6, "FOLDER_CONTENTS_CHANGED: " + p})
-			}
-			if curr[1] != prev[1] {
-				changes = append(changes, change{7, "FOLDER_STRUCTURE_CHANGED: " + p})
-			}
+		if curr[1] != prev[1] {
+			changes = append(changes, change{7, "FOLDER_STRUCTURE_CHANGED: " + p})
 		}
 	}
 
-	sort.Slice(changes, func(i, j int) bool { return changes[i].priority < changes[j].priority })
+	// Map iteration order is random; break ties by message so output is stable.
+	sort.Slice(changes, func(i, j int) bool {
+		if changes[i].priority != changes[j].priority {
+			return changes[i].priority < changes[j].priority
+		}
+		return changes[i].msg < changes[j].msg
+	})
 
 	result := make([]string, len(changes))
 	for i, c := range changes {
 		result[i] = c.msg
 	}
-	return result
+	return result, true
 }
 
 // --- Cache Persistence ---
 
+// The cache file is a flat binary log, decoded with plain slice reads instead
+// of reflection-driven JSON. Layout (integers little-endian):
+//
+//	header: magic "SYNC", version byte
+//	record: uvarint path length, path bytes,
+//	        int64 size, int64 mtime (ns), uint64 dev, uint64 ino,
+//	        32-byte SHA-256 digest
+//
+// Records run to the end of the file. A file with a different magic or
+// version, or a truncated record, is discarded and the cache starts empty.
+const (
+	cacheMagic   = "SYNC"
+	cacheVersion = 1
+	cacheFixed   = 4*8 + sha256.Size // fixed-size tail of every record
+)
+
 func loadCache() *Cache {
 	c := &Cache{Entries: make(map[string]CacheEntry)}
-	f, err := os.Open(cacheFile)
+	data, err := os.ReadFile(cacheFile)
 	if err != nil {
 		return c
 	}
-	defer f.Close()
-
-	if err := json.NewDecoder(f).Decode(c); err != nil {
-		c.Entries = make(map[string]CacheEntry)
+	if entries, ok := decodeCache(data); ok {
+		c.Entries = entries
 	}
 	return c
 }
 
+// decodeCache parses a cache file. A first pass validates the records and
+// totals the path lengths; the paths alone are then copied into one builder
+// and every key is sliced out of it, so loading makes one allocation for all
+// paths and keeps none of the record bytes alive.
+func decodeCache(data []byte) (map[string]CacheEntry, bool) {
+	header := len(cacheMagic) + 1
+	if len(data) < header || string(data[:len(cacheMagic)]) != cacheMagic || data[len(cacheMagic)] != cacheVersion {
+		return nil, false
+	}
+
+	var pathBytes, count int
+	for off := header; off < len(data); {
+		plen, n := binary.Uvarint(data[off:])
+		if n <= 0 {
+			return nil, false
+		}
+		off += n
+		if plen > uint64(len(data)-off) || uint64(len(data)-off)-plen < cacheFixed {
+			return nil, false
+		}
+		pathBytes += int(plen)
+		count++
+		off += int(plen) + cacheFixed
+	}
+
+	var b strings.Builder
+	b.Grow(pathBytes)
+	for off := header; off < len(data); {
+		plen, n := binary.Uvarint(data[off:])
+		off += n
+		b.Write(data[off : off+int(plen)])
+		off += int(plen) + cacheFixed
+	}
+	paths := b.String()
+
+	entries := make(map[string]CacheEntry, count)
+	pos := 0
+	for off := header; off < len(data); {
+		plen, n := binary.Uvarint(data[off:])
+		off += n
+		end := off + int(plen)
+		rec := data[end : end+cacheFixed]
+		entries[paths[pos:pos+int(plen)]] = CacheEntry{
+			Hash:    hex.EncodeToString(rec[32:]),
+			Size:    int64(binary.LittleEndian.Uint64(rec[0:])),
+			ModNano: int64(binary.LittleEndian.Uint64(rec[8:])),
+			Dev:     binary.LittleEndian.Uint64(rec[16:]),
+			Ino:     binary.LittleEndian.Uint64(rec[24:]),
+		}
+		pos += int(plen)
+		off = end + cacheFixed
+	}
+	return entries, true
+}
+
+func encodeCache(entries map[string]CacheEntry) []byte {
+	buf := make([]byte, 0, len(cacheMagic)+1+len(entries)*(cacheFixed+64))
+	buf = append(buf, cacheMagic...)
+	buf = append(buf, cacheVersion)
+
+	var digest [sha256.Size]byte
+	for path, e := range entries {
+		if n, err := hex.Decode(digest[:], []byte(e.Hash)); err != nil || n != len(digest) {
+			continue
+		}
+		buf = binary.AppendUvarint(buf, uint64(len(path)))
+		buf = append(buf, path...)
+		buf = binary.LittleEndian.AppendUint64(buf, uint64(e.Size))
+		buf = binary.LittleEndian.AppendUint64(buf, uint64(e.ModNano))
+		buf = binary.LittleEndian.AppendUint64(buf, e.Dev)
+		buf = binary.LittleEndian.AppendUint64(buf, e.Ino)
+		buf = append(buf, digest[:]...)
+	}
+	return buf
+}
+
+// saveCache rewrites the cache file only if a hash was computed this run;
+// a fully warm scan leaves it untouched instead of re-encoding every entry.
 func saveCache(c *Cache) {
-	data, err := json.Marshal(c)
-	if err != nil {
-		fmt.Fprintf(os.Stderr, "save cache: %v\n", err)
+	if !c.dirty {
 		return
 	}
-	if err := os.WriteFile(cacheFile, data, 0644); err != nil {
+	if err := os.WriteFile(cacheFile, encodeCache(c.Entries), 0644); err != nil {
 		fmt.Fprintf(os.Stderr, "write cache: %v\n", err)
 	}
 }